@@ -3,42 +3,75 @@ Chinese Article Reader Assistant - Backend API
 This will be implemented later with proper Chinese text processing.
 """
 
-import base64
+import hashlib
 import logging
+import os
 import re
-import unicodedata
-from collections import defaultdict
+import threading
+from collections import Counter
+from cachetools import LRUCache
 from dotenv import load_dotenv
+import orjson
 
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, Response, request, jsonify, render_template
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from flask_caching import Cache
 from botocore.exceptions import BotoCoreError, ClientError
 
-from text_processor import process_chinese_text
+from text_processor import CJK_IDEOGRAPHS_RE, get_tokenizer, process_chinese_text
 from resources.utils import init_dictionary
 from utils.aws import get_polly_client
 
 # Load environment variables from .env file
 load_dotenv()
 
+# Shared store for rate limits and cached responses across workers and
+# restarts; without it both fall back to per-process memory
+REDIS_URL = os.getenv("REDIS_URL")
+
+
+class ORJSONProvider(JSONProvider):
+    """Serialize JSON responses with orjson instead of the stdlib encoder."""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # Hand orjson's bytes to the response as-is instead of going through
+        # dumps(), which would decode to str only for Flask to encode it again
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj), mimetype="application/json")
+
+
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
 CORS(
     app, resources={r"/api/*": {"origins": "*"}}
 )  # Enable CORS for frontend communication
 
 # Configure rate limiting
 limiter = Limiter(
-    app=app, key_func=get_remote_address, default_limits=["200 per day", "50 per hour"]
+    app=app,
+    key_func=get_remote_address,
+    default_limits=["200 per day", "50 per hour"],
+    storage_uri=REDIS_URL or "memory://",
 )
 
 # Configure caching
+if REDIS_URL:
+    cache_config = {"CACHE_TYPE": "RedisCache", "CACHE_REDIS_URL": REDIS_URL}
+else:
+    cache_config = {"CACHE_TYPE": "SimpleCache"}  # Per-process, for development
 cache = Cache(
     app,
     config={
-        "CACHE_TYPE": "simple",  # Use 'redis' for production
+        **cache_config,
         "CACHE_DEFAULT_TIMEOUT": 3600,  # 1 hour default
     },
 )
@@ -50,14 +83,24 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # IP-based usage tracking for monitoring
-ip_usage = defaultdict(lambda: defaultdict(int))
-suspicious_ips = set()
+# Per-IP totals and flagged IPs are bounded to the most recently seen IPs so a
+# long-running server doesn't grow without limit; endpoint totals cover all
+# requests.
+MAX_TRACKED_IPS = 10_000
+ip_request_counts = LRUCache(maxsize=MAX_TRACKED_IPS)
+endpoint_request_counts = Counter()
+usage_lock = threading.Lock()
+suspicious_ips = LRUCache(maxsize=MAX_TRACKED_IPS)  # Used as a bounded set
 
 # Request size limits
 MAX_PROCESS_TEXT_LENGTH = 5000  # characters for text processing
 MAX_SPEECH_TEXT_LENGTH = 2000  # characters for speech synthesis
 
+WHITESPACE_RE = re.compile(r"\s+")
+REPEATED_CHAR_RE = re.compile(r"(.)\1{50,}")  # 50+ repeated characters
+
 dictionary = init_dictionary()
+get_tokenizer()  # Load the segmentation model before workers fork
 
 
 def validate_chinese_text(text):
@@ -74,16 +117,15 @@ def validate_chinese_text(text):
         return False, "Text cannot be empty"
 
     # Check for excessive non-Chinese characters (potential spam)
-    chinese_chars = sum(
-        1 for char in text_stripped if unicodedata.category(char) == "Lo"
-    )
-    total_chars = len(re.sub(r"\s+", "", text_stripped))  # Remove whitespace
+    # Count by deleting ideograph runs in C rather than testing each char
+    chinese_chars = len(text_stripped) - len(CJK_IDEOGRAPHS_RE.sub("", text_stripped))
+    total_chars = len(WHITESPACE_RE.sub("", text_stripped))  # Remove whitespace
 
     if total_chars > 0 and chinese_chars / total_chars < 0.1:
         return False, "Text must contain at least 10% Chinese characters"
 
     # Check for suspicious patterns (repeated characters, etc.)
-    if re.search(r"(.)\1{50,}", text_stripped):  # 50+ repeated characters
+    if REPEATED_CHAR_RE.search(text_stripped):
         return False, "Text contains suspicious repeated characters"
 
     return True, None
@@ -94,17 +136,46 @@ def log_request_info():
     ip = request.remote_addr
     endpoint = request.endpoint
 
-    if endpoint and endpoint.startswith("api."):
-        ip_usage[ip][endpoint] += 1
+    # Count API calls only; unmatched paths have no endpoint
+    if endpoint and request.path.startswith("/api/"):
+        with usage_lock:
+            total_requests = ip_request_counts.get(ip, 0) + 1
+            ip_request_counts[ip] = total_requests
+            endpoint_request_counts[endpoint] += 1
+
+            # Check for suspicious activity
+            if total_requests > 100:  # Threshold for suspicious activity
+                if ip not in suspicious_ips:
+                    suspicious_ips[ip] = True
+                    logger.warning(
+                        f"Suspicious activity detected from IP: {ip} (total requests: {total_requests})"
+                    )
+
 
-        # Check for suspicious activity
-        total_requests = sum(ip_usage[ip].values())
-        if total_requests > 100:  # Threshold for suspicious activity
-            if ip not in suspicious_ips:
-                suspicious_ips.add(ip)
-                logger.warning(
-                    f"Suspicious activity detected from IP: {ip} (total requests: {total_requests})"
-                )
+def request_body_cache_key():
+    """Cache key for POST endpoints, derived from the raw request body."""
+    body_hash = hashlib.sha1(request.get_data()).hexdigest()
+    return f"{request.path}:{body_hash}"
+
+
+def process_text_cache_key():
+    """Cache key for /api/process, derived from the submitted text only."""
+    data = request.get_json(silent=True) or {}
+    text = (data.get("text") or "").strip()
+    text_hash = hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+    return f"proc:{text_hash}"
+
+
+def is_cacheable_response(response):
+    """
+    Only cache successful, complete responses. Errors are returned as tuples;
+    responses marked no-store (e.g. with failed translations) are skipped.
+    """
+    return (
+        not isinstance(response, tuple)
+        and response.status_code == 200
+        and not response.cache_control.no_store
+    )
 
 
 def check_request_size(text, max_length, endpoint_name):
@@ -129,6 +200,11 @@ def before_request():
 # API routes must come before catch-all routes
 @app.route("/api/process", methods=["POST", "OPTIONS"])
 @limiter.limit("10 per minute; 100 per hour")  # More permissive for text processing
+@cache.cached(
+    timeout=86400,
+    make_cache_key=process_text_cache_key,
+    response_filter=is_cacheable_response,
+)  # Cache processed text for 24 hours
 def process_text():
     """
     API endpoint to process Chinese text and return phrases with pinyin and definitions.
@@ -156,7 +232,12 @@ def process_text():
 
         # Process text
         result = process_chinese_text(text)
-        return jsonify(result)
+        translation_failed = result.pop("translation_failed")
+        response = jsonify(result)
+        if translation_failed:
+            # Don't cache placeholder translations; retry on the next request
+            response.cache_control.no_store = True
+        return response
 
     except Exception as e:
         logger.error(f"Error processing text from {request.remote_addr}: {str(e)}")
@@ -176,25 +257,20 @@ def get_stats():
     if request.remote_addr not in ["127.0.0.1", "localhost", "::1"]:
         return jsonify({"error": "Access denied"}), 403
 
-    total_requests = sum(
-        sum(endpoint_counts.values()) for endpoint_counts in ip_usage.values()
-    )
+    with usage_lock:
+        ip_counts = Counter(dict(ip_request_counts.items()))
+        endpoint_counts = endpoint_request_counts.copy()
+        suspicious = list(suspicious_ips)
 
     return jsonify(
         {
-            "total_requests": total_requests,
-            "unique_ips": len(ip_usage),
-            "suspicious_ips": list(suspicious_ips),
-            "top_ips": sorted(
-                [(ip, sum(counts.values())) for ip, counts in ip_usage.items()],
-                key=lambda x: x[1],
-                reverse=True,
-            )[:10],  # Top 10 IPs by request count
+            "total_requests": sum(endpoint_counts.values()),
+            "unique_ips": len(ip_counts),
+            "suspicious_ips": suspicious,
+            "top_ips": ip_counts.most_common(10),  # Top 10 IPs by request count
             "endpoint_usage": {
-                endpoint: sum(
-                    ip_counts.get(endpoint, 0) for ip_counts in ip_usage.values()
-                )
-                for endpoint in ["api.process_text", "api.read_aloud"]
+                endpoint: endpoint_counts[endpoint]
+                for endpoint in ["process_text", "read_aloud"]
             },
         }
     )
@@ -202,10 +278,14 @@ def get_stats():
 
 @app.route("/api/read-aloud", methods=["POST", "OPTIONS"])
 @limiter.limit("5 per minute; 20 per hour")  # More restrictive due to AWS Polly costs
-@cache.cached(timeout=7200, query_string=True)  # Cache audio for 2 hours
+@cache.cached(
+    timeout=7200,
+    make_cache_key=request_body_cache_key,
+    response_filter=is_cacheable_response,
+)  # Cache audio for 2 hours
 def read_aloud():
     """
-    Convert processed text into speech using AWS Polly and return as base64 audio.
+    Convert processed text into speech using AWS Polly and return the audio bytes.
     Includes rate limiting, caching, size limits, and input validation.
     """
     try:
@@ -292,14 +372,8 @@ def read_aloud():
         if not audio_bytes:
             return jsonify({"error": "AWS Polly returned empty audio"}), 500
 
-        audio_base64 = base64.b64encode(audio_bytes).decode("utf-8")
-
-        return jsonify(
-            {
-                "audio": audio_base64,
-                "contentType": response.get("ContentType", "audio/mpeg"),
-            }
-        )
+        # Send the MP3 as-is rather than base64 inside JSON (~33% smaller)
+        return Response(audio_bytes, mimetype=response.get("ContentType", "audio/mpeg"))
 
     except Exception as e:
         logger.error(
@@ -0,0 +1,77 @@
+"""
+Download of the CC-CEDICT dictionary file
+Safe to call from several worker processes at once
+"""
+
+import fcntl
+import os
+import zipfile
+from pathlib import Path
+
+import requests
+
+CEDICT_URL = "https://www.mdbg.net/chinese/export/cedict/cedict_1_0_ts_utf-8_mdbg.zip"
+CEDICT_PATH = Path("resources/cedict_ts.u8")
+CEDICT_ZIP_PATH = Path("resources/cedict_1_0_ts_utf-8_mdbg.zip")
+CEDICT_LOCK_PATH = Path("resources/.cedict.lock")
+
+
+def download_file(url: str, path: str, chunk_size: int = 1 << 20):
+    """
+    Stream a download to disk without buffering the whole body in memory.
+
+    The body is written to a per-process temporary file and only moved to
+    path once complete, so an interrupted download never leaves a truncated
+    file that later runs would mistake for a finished one.
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with requests.get(url, stream=True) as response:
+            response.raise_for_status()
+            with open(tmp_path, "wb") as f:
+                for chunk in response.iter_content(chunk_size):
+                    f.write(chunk)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def ensure_cedict() -> Path:
+    """
+    Make sure the CC-CEDICT file exists, downloading it if needed
+
+    Returns immediately when the file is already present. Otherwise an
+    exclusive file lock ensures only one process downloads it while any
+    others wait and then reuse the result.
+
+    Returns:
+        Path to the dictionary file
+    """
+    if CEDICT_PATH.exists():
+        return CEDICT_PATH
+
+    CEDICT_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with open(CEDICT_LOCK_PATH, "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            # Another process may have finished the download while we waited
+            if CEDICT_PATH.exists():
+                return CEDICT_PATH
+
+            print("Downloading CC-CEDICT dictionary...")
+            download_file(CEDICT_URL, CEDICT_ZIP_PATH)
+            print("Unzipping dictionary...")
+            tmp_path = CEDICT_PATH.with_suffix(".tmp")
+            with zipfile.ZipFile(CEDICT_ZIP_PATH, "r") as zip_ref:
+                with zip_ref.open(CEDICT_PATH.name) as src, open(tmp_path, "wb") as dst:
+                    while chunk := src.read(1 << 20):
+                        dst.write(chunk)
+            # Only expose the file once it is complete
+            os.replace(tmp_path, CEDICT_PATH)
+            print("Dictionary downloaded and unzipped successfully")
+            os.remove(CEDICT_ZIP_PATH)
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    return CEDICT_PATH
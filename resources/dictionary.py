@@ -3,15 +3,22 @@ Dictionary parser for CC-CEDICT format
 Parses the cedict_ts.u8 file and provides lookup functionality
 """
 
+import logging
 import os
+import pickle
 import re
+import sqlite3
+import threading
 from typing import Dict, List, Optional
 from functools import lru_cache
 from huggingface_hub import InferenceClient
 
 from utils.aws import get_ssm_parameter
 
+logger = logging.getLogger(__name__)
 
+
+@lru_cache(maxsize=1)
 def get_huggingface_token():
     LOCAL_ENV_VAR_NAME = "HF_INFERENCE_TOKEN"
     SSM_PARAMETER_NAME = "/chinese-reader/HF_INFERENCE_TOKEN"
@@ -33,11 +40,97 @@ def get_huggingface_token():
         )
 
 
-client = InferenceClient(
-    provider="hf-inference",
-    api_key=get_huggingface_token(),
-    timeout=60,  # 30 second timeout for API calls
-)
+@lru_cache(maxsize=1)
+def get_inference_client() -> InferenceClient:
+    """Create the Hugging Face client on first translation, not at import"""
+    return InferenceClient(
+        provider="hf-inference",
+        api_key=get_huggingface_token(),
+        timeout=60,  # 30 second timeout for API calls
+    )
+
+
+# Bump when the pickled index layout or DictionaryEntry changes
+_CACHE_VERSION = 2
+
+# Tone marks mapping
+_TONE_MARKS = {
+    "a": ["ā", "á", "ǎ", "à", "a"],
+    "e": ["ē", "é", "ě", "è", "e"],
+    "i": ["ī", "í", "ǐ", "ì", "i"],
+    "o": ["ō", "ó", "ǒ", "ò", "o"],
+    "u": ["ū", "ú", "ǔ", "ù", "u"],
+    "ü": ["ǖ", "ǘ", "ǚ", "ǜ", "ü"],
+}
+
+# Pattern to match pinyin in brackets like [pan2], [zhong1 wen2], etc.
+_DEFINITION_PINYIN_RE = re.compile(r"\[([a-züA-ZÜ]+\d+(?:\s+[a-züA-ZÜ]+\d+)*)\]")
+
+# Toned syllable -> accented syllable. Mandarin has only ~1500 toned
+# syllables, so this stays small while sparing the conversion per entry.
+_SYLLABLE_CACHE: Dict[str, str] = {}
+
+
+def _add_tone(syllable: str) -> str:
+    """Add tone mark to a single syllable, e.g. "zhong1" -> "zhōng" """
+    if not syllable or not syllable[-1].isdigit():
+        return syllable
+
+    tone_num = int(syllable[-1]) - 1  # Convert 1-5 to 0-4
+    syllable_no_tone = syllable[:-1]
+
+    # Find the vowel to add tone mark to
+    # Priority: a, e, o, then i/u/ü
+    for vowel in ("a", "e", "o", "i", "u", "ü"):
+        idx = syllable_no_tone.find(vowel)
+        if idx != -1:
+            return (
+                syllable_no_tone[:idx]
+                + _TONE_MARKS[vowel][tone_num]
+                + syllable_no_tone[idx + 1 :]
+            )
+
+    return syllable_no_tone
+
+
+class DictionaryEntry:
+    """A single CC-CEDICT entry"""
+
+    # Slots instead of a per-entry dict: the dictionary holds ~120k of these
+    __slots__ = ("traditional", "simplified", "pinyin", "pinyin_raw", "definition")
+
+    def __init__(
+        self,
+        traditional: str,
+        simplified: str,
+        pinyin: str,
+        pinyin_raw: str,
+        definition: str,
+    ):
+        self.traditional = traditional
+        self.simplified = simplified
+        self.pinyin = pinyin
+        self.pinyin_raw = pinyin_raw
+        self.definition = definition
+
+    @property
+    def text(self) -> str:
+        """Use simplified as default"""
+        return self.simplified
+
+    def to_dict(self) -> Dict[str, str]:
+        """Convert entry to dictionary for JSON serialization"""
+        return {
+            "text": self.text,
+            "traditional": self.traditional,
+            "simplified": self.simplified,
+            "pinyin": self.pinyin,
+            "pinyin_raw": self.pinyin_raw,
+            "definition": self.definition,
+        }
+
+    def __repr__(self) -> str:
+        return f"DictionaryEntry({self.to_dict()!r})"
 
 
 class ChineseDictionary:
@@ -51,54 +144,180 @@ class ChineseDictionary:
             dict_file: Path to the CC-CEDICT dictionary file
         """
         self.dict_file = dict_file
-        self.entries: Dict[str, List[Dict]] = {}
+        self.cache_file = os.path.join(os.path.dirname(dict_file), "cedict.pkl")
+        self.entries: Dict[str, List[DictionaryEntry]] = {}
+        self._max_key_len = 0
+        self._prefix_index: Dict[str, bool] = {}
         self._load_dictionary()
-        self.phrases = set[str](self.entries.keys())
+
+    @property
+    def max_key_len(self) -> int:
+        """Length of the longest phrase in the dictionary"""
+        return self._max_key_len
 
     def is_phrase_in_dictionary(self, phrase: str) -> bool:
         """Check if a phrase is in the dictionary"""
-        return phrase in self.phrases
+        return phrase in self.entries
+
+    def segment(self, phrase: str) -> List[str]:
+        """
+        Split a phrase into dictionary words by forward maximum matching
+
+        Args:
+            phrase: Chinese phrase to segment
+
+        Returns:
+            List of words; characters not starting any dictionary word are
+            returned on their own
+        """
+        words = []
+        lookup = self._prefix_index.get
+        n = len(phrase)
+        i = 0
+        while i < n:
+            end = i + 1
+            j = i + 1
+            # One probe per character answers both "can a longer word
+            # follow?" and "is this a word?"
+            while j <= n:
+                is_word = lookup(phrase[i:j])
+                if is_word is None:
+                    break
+                if is_word:
+                    end = j
+                j += 1
+            words.append(phrase[i:end])
+            i = end
+        return words
 
     def _load_dictionary(self):
-        """Load and parse the dictionary file"""
+        """Load the prebuilt index if it is current, otherwise parse the file"""
+        if self._load_cache():
+            return
+
+        self._parse_dictionary()
+        self._build_index()
+        if self.entries:
+            self._save_cache()
+
+    def _build_index(self):
+        """Derive the lookup structures used by segmentation"""
+        # Longest key in the dictionary; no prefix longer than this can match
+        self._max_key_len = max(map(len, self.entries), default=0)
+        # Every prefix of every key mapped to whether it is itself a key, so
+        # segmentation can stop extending a match as soon as no longer key
+        # is possible (jieba's prefix dict). A nested-dict trie gives the same
+        # walk but costs several times the memory.
+        self._prefix_index = {}
+        for key in self.entries:
+            for end in range(1, len(key)):
+                self._prefix_index.setdefault(key[:end], False)
+        for key in self.entries:
+            self._prefix_index[key] = True
+
+    def _load_cache(self) -> bool:
+        """
+        Load the pickled index built from an earlier parse
+
+        Returns:
+            True if the cache matched the dictionary file and was loaded
+        """
+        try:
+            src_mtime = os.path.getmtime(self.dict_file)
+            with open(self.cache_file, "rb") as f:
+                cached = pickle.load(f)
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            print(f"Warning: Could not read dictionary cache {self.cache_file}: {e}")
+            return False
+
+        if cached.get("version") != _CACHE_VERSION or cached.get("mtime") != src_mtime:
+            return False
+
+        self.entries = cached["entries"]
+        self._max_key_len = cached["max_key_len"]
+        self._prefix_index = cached["prefix_index"]
+        print(f"Dictionary loaded from cache: {len(self.entries)} unique phrases")
+        return True
+
+    def _save_cache(self):
+        """Pickle the parsed index next to the dictionary file"""
+        tmp_file = f"{self.cache_file}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_file, "wb") as f:
+                pickle.dump(
+                    {
+                        "version": _CACHE_VERSION,
+                        "mtime": os.path.getmtime(self.dict_file),
+                        "entries": self.entries,
+                        "max_key_len": self._max_key_len,
+                        "prefix_index": self._prefix_index,
+                    },
+                    f,
+                    protocol=5,
+                )
+            # Atomic swap so concurrent workers never read a partial file
+            os.replace(tmp_file, self.cache_file)
+        except OSError as e:
+            print(f"Warning: Could not write dictionary cache {self.cache_file}: {e}")
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+
+    def _parse_dictionary(self):
+        """Parse the CC-CEDICT dictionary file"""
         print(f"Loading dictionary from {self.dict_file}...")
 
         try:
             with open(self.dict_file, "r", encoding="utf-8") as f:
                 entry_count = 0
                 for line in f:
-                    line = line.strip()
                     # Skip comments and empty lines
-                    if not line or line.startswith("#"):
+                    if line[0] == "#":
+                        continue
+                    line = line.rstrip()
+                    if not line:
                         continue
 
                     # Parse the line: Traditional Simplified [pinyin] /definition/
                     # Format: 中文 中文 [zhong1 wen2] /Chinese (language)/
-                    match = re.match(r"^(.+?)\s+(.+?)\s+\[(.+?)\]\s+/(.+?)/$", line)
-                    if match:
-                        traditional, simplified, pinyin, definition = match.groups()
-
-                        # Store entry for both traditional and simplified
-                        entry = {
-                            "text": simplified,  # Use simplified as default
-                            "traditional": traditional,
-                            "simplified": simplified,
-                            "pinyin": self._format_pinyin(pinyin),
-                            "pinyin_raw": pinyin,
-                            "definition": self._format_definition_pinyin(definition),
-                        }
-
-                        # Index by both traditional and simplified
-                        if simplified not in self.entries:
-                            self.entries[simplified] = []
-                        self.entries[simplified].append(entry)
-
-                        if traditional != simplified:
-                            if traditional not in self.entries:
-                                self.entries[traditional] = []
-                            self.entries[traditional].append(entry)
-
-                        entry_count += 1
+                    try:
+                        sp1 = line.index(" ")
+                        sp2 = line.index(" ", sp1 + 1)
+                        br1 = line.index("[", sp2)
+                        br2 = line.index("]", br1)
+                    except ValueError:
+                        continue
+                    if line[br2 + 1 : br2 + 3] != " /" or line[-1] != "/":
+                        continue
+
+                    traditional = line[:sp1]
+                    simplified = line[sp1 + 1 : sp2]
+                    pinyin = line[br1 + 1 : br2]
+                    definition = line[br2 + 3 : -1]
+                    if not definition:
+                        continue
+
+                    # Store entry for both traditional and simplified
+                    entry = DictionaryEntry(
+                        traditional=traditional,
+                        simplified=simplified,
+                        pinyin=self._format_pinyin(pinyin),
+                        pinyin_raw=pinyin,
+                        definition=self._format_definition_pinyin(definition),
+                    )
+
+                    # Index by both traditional and simplified
+                    if simplified not in self.entries:
+                        self.entries[simplified] = []
+                    self.entries[simplified].append(entry)
+
+                    if traditional != simplified:
+                        if traditional not in self.entries:
+                            self.entries[traditional] = []
+                        self.entries[traditional].append(entry)
+
+                    entry_count += 1
 
                 print(
                     f"Dictionary loaded: {entry_count} entries, {len(self.entries)} unique phrases"
@@ -120,45 +339,12 @@ class ChineseDictionary:
         Returns:
             Formatted pinyin with tone marks
         """
-        # Tone marks mapping
-        tone_marks = {
-            "a": ["ā", "á", "ǎ", "à", "a"],
-            "e": ["ē", "é", "ě", "è", "e"],
-            "i": ["ī", "í", "ǐ", "ì", "i"],
-            "o": ["ō", "ó", "ǒ", "ò", "o"],
-            "u": ["ū", "ú", "ǔ", "ù", "u"],
-            "ü": ["ǖ", "ǘ", "ǚ", "ǜ", "ü"],
-        }
-
-        def add_tone(syllable: str) -> str:
-            """Add tone mark to a single syllable"""
-            # Extract tone number
-            tone_match = re.search(r"(\d)", syllable)
-            if not tone_match:
-                return syllable
-
-            tone_num = int(tone_match.group(1)) - 1  # Convert 1-5 to 0-4
-            syllable_no_tone = re.sub(r"\d", "", syllable)
-
-            # Find the vowel to add tone mark to
-            # Priority: a, e, o, then i/u/ü
-            for vowel in ["a", "e", "o", "i", "u", "ü"]:
-                if vowel in syllable_no_tone:
-                    idx = syllable_no_tone.index(vowel)
-                    vowel_char = syllable_no_tone[idx]
-                    if vowel_char in tone_marks:
-                        new_vowel = tone_marks[vowel_char][tone_num]
-                        return (
-                            syllable_no_tone[:idx]
-                            + new_vowel
-                            + syllable_no_tone[idx + 1 :]
-                        )
-
-            return syllable_no_tone
-
-        # Split into syllables and process each
-        syllables = pinyin_raw.split()
-        formatted = [add_tone(syl) for syl in syllables]
+        formatted = []
+        for syllable in pinyin_raw.split():
+            accented = _SYLLABLE_CACHE.get(syllable)
+            if accented is None:
+                accented = _SYLLABLE_CACHE[syllable] = _add_tone(syllable)
+            formatted.append(accented)
         return " ".join(formatted)
 
     def _format_definition_pinyin(self, definition: str) -> str:
@@ -172,8 +358,9 @@ class ChineseDictionary:
         Returns:
             Definition with pinyin converted to accented format
         """
-        # Pattern to match pinyin in brackets like [pan2], [zhong1 wen2], etc.
-        pinyin_pattern = r"\[([a-züA-ZÜ]+\d+(?:\s+[a-züA-ZÜ]+\d+)*)\]"
+        # Most definitions have no bracketed pinyin; skip the regex for them
+        if "[" not in definition:
+            return definition
 
         def replace_pinyin(match):
             pinyin_in_brackets = match.group(1)
@@ -181,9 +368,9 @@ class ChineseDictionary:
             return formatted
 
         # Replace all pinyin patterns in the definition
-        return re.sub(pinyin_pattern, replace_pinyin, definition)
+        return _DEFINITION_PINYIN_RE.sub(replace_pinyin, definition)
 
-    def cedict_lookup(self, phrase: str) -> Optional[List[Dict]]:
+    def cedict_lookup(self, phrase: str) -> Optional[List[DictionaryEntry]]:
         """
         Look up a Chinese phrase in the dictionary
 
@@ -197,9 +384,9 @@ class ChineseDictionary:
 
     def get_definition(self, phrase: str) -> Optional[str]:
         """Get English definition for a phrase"""
-        entry = self.lookup_best(phrase)
-        if entry:
-            return entry["definition"]
+        entries = self.cedict_lookup(phrase)
+        if entries:
+            return entries[0].definition
         return None
 
 
@@ -215,7 +402,7 @@ def get_dictionary() -> ChineseDictionary:
     return _dictionary_instance
 
 
-def cedict_lookup_best(phrase: str) -> Optional[Dict]:
+def cedict_lookup_best(phrase: str) -> Optional[DictionaryEntry]:
     """
     Look up a phrase and return the first (best) match
 
@@ -231,7 +418,7 @@ def cedict_lookup_best(phrase: str) -> Optional[Dict]:
     return None
 
 
-def cedict_lookup(phrase: str) -> Optional[List[Dict]]:
+def cedict_lookup(phrase: str) -> Optional[List[DictionaryEntry]]:
     """
     Look up a Chinese phrase in the dictionary
 
@@ -245,47 +432,109 @@ def cedict_lookup(phrase: str) -> Optional[List[Dict]]:
     return dictionary.entries.get(phrase)
 
 
+@lru_cache(maxsize=65536)
 def get_pinyin(phrase: str) -> Optional[str]:
-    """Get pinyin for a phrase"""
+    """
+    Get pinyin for a phrase by segmenting it into dictionary words
+
+    Args:
+        phrase: Chinese phrase to convert
+
+    Returns:
+        Space-separated pinyin; characters missing from the dictionary are
+        skipped
+    """
     if not phrase:
         return ""
 
-    for end_index in range(len(phrase), 0, -1):
-        segment = phrase[:end_index]
-        entry = cedict_lookup_best(segment)
+    dictionary = get_dictionary()
+    syllables = []
+    for word in dictionary.segment(phrase):
+        entries = dictionary.entries.get(word)
+        if entries:
+            syllables.append(entries[0].pinyin)
+
+    return " ".join(syllables)
 
-        if entry is not None:
-            remaining_phrase = phrase[end_index:]
 
-            recursive_pinyin = get_pinyin(remaining_phrase)
+# Translations persisted across requests and restarts
+OOV_CACHE_FILE = "resources/oov_cache.sqlite"
+_oov_db: Optional[sqlite3.Connection] = None
+_oov_lock = threading.Lock()
 
-            if recursive_pinyin is not None:
-                return entry["pinyin"] + " " + recursive_pinyin
 
-    return ""
+def _get_oov_db() -> sqlite3.Connection:
+    """Open the translation cache database, creating it on first use"""
+    global _oov_db
+    if _oov_db is None:
+        _oov_db = sqlite3.connect(OOV_CACHE_FILE, check_same_thread=False)
+        _oov_db.execute(
+            "CREATE TABLE IF NOT EXISTS oov (phrase TEXT PRIMARY KEY, translation TEXT)"
+        )
+        _oov_db.commit()
+    return _oov_db
 
 
+def _get_cached_translation(text: str) -> Optional[str]:
+    """Look up a previously stored translation"""
+    try:
+        with _oov_lock:
+            row = (
+                _get_oov_db()
+                .execute("SELECT translation FROM oov WHERE phrase = ?", (text,))
+                .fetchone()
+            )
+    except sqlite3.Error as e:
+        logger.warning(f"Could not read translation cache: {e}")
+        return None
+    return row[0] if row else None
+
+
+def _cache_translation(text: str, translation: str):
+    """Store a translation for later requests"""
+    try:
+        with _oov_lock:
+            db = _get_oov_db()
+            db.execute(
+                "INSERT OR REPLACE INTO oov (phrase, translation) VALUES (?, ?)",
+                (text, translation),
+            )
+            db.commit()
+    except sqlite3.Error as e:
+        logger.warning(f"Could not write translation cache: {e}")
+
+
+class TranslationError(Exception):
+    """Raised when Hugging Face translation fails after all retries"""
+
+
+# Failures raise instead of returning a fallback, so neither this cache nor the
+# translation database ever holds an error message
 @lru_cache(maxsize=1000)
 def hf_translate(text):
+    cached = _get_cached_translation(text)
+    if cached is not None:
+        return cached
+
     max_retries = 2
     for attempt in range(max_retries + 1):
         try:
-            result = client.translation(
+            result = get_inference_client().translation(
                 text,
                 model="Helsinki-NLP/opus-mt-zh-en",
             )
+            _cache_translation(text, result.translation_text)
             return result.translation_text
         except Exception as e:
             if attempt < max_retries:
-                print(
+                logger.warning(
                     f"Translation attempt {attempt + 1} failed for text '{text}': {e}. Retrying..."
                 )
                 import time
 
                 time.sleep(1)  # Wait 1 second before retry
             else:
-                print(
+                logger.error(
                     f"Translation failed after {max_retries + 1} attempts for text '{text}': {e}"
                 )
-                # Return a fallback message instead of crashing
-                return f"[Translation unavailable: {str(e)}]"
+                raise TranslationError(str(e)) from e
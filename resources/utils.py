@@ -1,35 +1,24 @@
+from functools import lru_cache
 from pathlib import Path
 import json
 import re
-import os
-import zipfile
-from resources.dictionary import ChineseDictionary
-import requests
+from typing import Optional, Tuple
+from resources.bootstrap import download_file, ensure_cedict
+from resources.dictionary import DictionaryEntry, get_dictionary
 
 hsk_vocab = None
+hsk_max_len = 0
 
 
 def init_dictionary():
-    if not Path("resources/cedict_ts.u8").exists():
-        if not os.path.exists("resources"):
-            os.makedirs("resources")
-        print("Downloading CC-CEDICT dictionary...")
-        response = requests.get(
-            "https://www.mdbg.net/chinese/export/cedict/cedict_1_0_ts_utf-8_mdbg.zip"
-        )
-        with open("resources/cedict_1_0_ts_utf-8_mdbg.zip", "wb") as f:
-            f.write(response.content)
-        print("Unzipping dictionary...")
-        with zipfile.ZipFile("resources/cedict_1_0_ts_utf-8_mdbg.zip", "r") as zip_ref:
-            zip_ref.extractall("resources")
-        print("Dictionary downloaded and unzipped successfully")
-        print("deleting zip file...")
-        os.remove("resources/cedict_1_0_ts_utf-8_mdbg.zip")
-        print("zip file deleted successfully")
-
-    # Initialize dictionary at startup - this loads it once when the app starts
+    ensure_cedict()
+
+    # Initialize dictionary at startup - this loads it once when the app starts.
+    # Use the shared instance so lookups reuse it, and so gunicorn --preload
+    # loads it once in the master instead of once per worker.
     print("Initializing Chinese dictionary...")
-    dictionary = ChineseDictionary()
+    dictionary = get_dictionary()
+    _load_hsk_vocabulary()
     print("Dictionary ready!")
 
     return dictionary
@@ -38,11 +27,10 @@ def init_dictionary():
 def get_hsk_vocabulary():
     if not Path("resources/hsk_vocabulary.json").exists():
         print("Downloading HSK vocabulary...")
-        response = requests.get(
-            "https://raw.githubusercontent.com/drkameleon/complete-hsk-vocabulary/refs/heads/main/complete.json"
+        download_file(
+            "https://raw.githubusercontent.com/drkameleon/complete-hsk-vocabulary/refs/heads/main/complete.json",
+            "resources/hsk_vocabulary.json",
         )
-        with open("resources/hsk_vocabulary.json", "wb") as f:
-            f.write(response.content)
         print("HSK vocabulary downloaded successfully")
     else:
         print("HSK vocabulary already downloaded")
@@ -56,34 +44,70 @@ def get_hsk_vocabulary():
     return vocab
 
 
-def _lookup_hsk_level(phrase: str) -> str:
-    global hsk_vocab
+def _load_hsk_vocabulary():
+    global hsk_vocab, hsk_max_len
     if hsk_vocab is None:
         hsk_vocab = get_hsk_vocabulary()
+        hsk_max_len = max(map(len, hsk_vocab), default=0)
+    return hsk_vocab
 
-    lvl = hsk_vocab.get(phrase, None)
+
+def _lookup_hsk_level(phrase: str) -> str:
+    lvl = _load_hsk_vocabulary().get(phrase, None)
     if lvl is not None:
         lvl = re.sub(r"[^0-9+]", "", lvl[-1])
 
     return lvl
 
 
+def _hsk_level_key(lvl: str):
+    return (int(lvl.rstrip("+")), lvl.endswith("+"))
+
+
 def get_hsk_level(phrase: str) -> int:
     lvl = _lookup_hsk_level(phrase)
     if lvl is not None:
         return lvl
 
-    unique_substrings = {
-        phrase[i:j] for i in range(len(phrase)) for j in range(i + 1, len(phrase) + 1)
-    }
-
-    lvls = [_lookup_hsk_level(substring) for substring in unique_substrings]
-
-    max_val = max(
-        lvls,
-        key=lambda s: (-1, False)
-        if s is None
-        else (int(s.rstrip("+")), s.endswith("+")),
-    )
-
-    return max_val
+    # Take the highest level of any substring, probing only lengths that
+    # can exist in the vocabulary instead of materializing every substring
+    best = None
+    best_key = None
+    n = len(phrase)
+    for i in range(n):
+        for j in range(i + 1, min(i + hsk_max_len, n) + 1):
+            lvl = _lookup_hsk_level(phrase[i:j])
+            if lvl is None:
+                continue
+            key = _hsk_level_key(lvl)
+            if best is None or key > best_key:
+                best, best_key = lvl, key
+
+    return best
+
+
+# The only cache on these lookups; get_hsk_level's substring scan is the costly
+# part. Entries are cached as tuples so callers never share the dictionary's
+# own lists.
+@lru_cache(maxsize=65536)
+def lookup_phrase(
+    phrase: str,
+) -> Tuple[Optional[Tuple[DictionaryEntry, ...]], Optional[str]]:
+    """
+    Look up a phrase's CC-CEDICT entries and HSK level in one cached call
+
+    Args:
+        phrase: Chinese phrase to look up
+
+    Returns:
+        Tuple of (matching entries or None, HSK level or None)
+    """
+    dictionary = get_dictionary()
+    # Nothing longer than the longest dictionary key can be an entry
+    entries = None
+    if len(phrase) <= dictionary.max_key_len:
+        found = dictionary.entries.get(phrase)
+        if found:
+            entries = tuple(found)
+
+    return entries, get_hsk_level(phrase)
@@ -83,14 +83,33 @@ function updateReadAloudAvailability() {
     readAloudBtn.disabled = !currentProcessedText.trim();
 }
 
-function base64ToArrayBuffer(base64) {
-    const binaryString = atob(base64);
-    const len = binaryString.length;
-    const bytes = new Uint8Array(len);
-    for (let i = 0; i < len; i += 1) {
-        bytes[i] = binaryString.charCodeAt(i);
+// Fetch synthesized speech as a Blob. The server responds with raw audio
+// bytes on success and a JSON error body otherwise.
+async function fetchSpeechBlob(text) {
+    const response = await fetch('/api/read-aloud', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ text: text }),
+    });
+
+    if (!response.ok) {
+        let data = {};
+        try {
+            data = await response.json();
+        } catch (jsonError) {
+            // Intentionally swallow JSON parsing errors to provide a generic message.
+        }
+        const message = data.error || 'Failed to generate audio. Please try again.';
+        throw new Error(message);
+    }
+
+    const blob = await response.blob();
+    if (!blob.size) {
+        throw new Error('No audio returned from server.');
     }
-    return bytes.buffer;
+    return blob;
 }
 
 async function handleReadAloud() {
@@ -110,39 +129,14 @@ async function handleReadAloud() {
     readAloudBtn.textContent = 'Preparing...';
 
     try {
-        const response = await fetch('/api/read-aloud', {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-            },
-            body: JSON.stringify({ text: currentProcessedText }),
-        });
-
-        let data = {};
-        try {
-            data = await response.json();
-        } catch (jsonError) {
-            // Intentionally swallow JSON parsing errors to provide a generic message.
-        }
-
-        if (!response.ok) {
-            const message = data.error || 'Failed to generate audio. Please try again.';
-            throw new Error(message);
-        }
-
-        if (!data.audio) {
-            throw new Error('No audio returned from server.');
-        }
+        const blob = await fetchSpeechBlob(currentProcessedText);
 
-        // Store speech marks
-        speechMarks = data.speechMarks || [];
+        // Reset speech marks
+        speechMarks = [];
 
         // Build phrase span mapping
         buildPhraseSpanMapping();
 
-        const audioBuffer = base64ToArrayBuffer(data.audio);
-        const blob = new Blob([audioBuffer], { type: data.contentType || 'audio/mpeg' });
-
         if (currentAudioUrl) {
             URL.revokeObjectURL(currentAudioUrl);
         }
@@ -305,38 +299,12 @@ async function playPhraseAudio(text) {
     }
 
     try {
-        const response = await fetch('/api/read-aloud', {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-            },
-            body: JSON.stringify({ text: trimmedText }),
-        });
-
-        let data = {};
-        try {
-            data = await response.json();
-        } catch (jsonError) {
-            // Intentionally swallow JSON parsing errors to provide a generic message.
-        }
-
-        if (!response.ok) {
-            const message = data.error || 'Failed to generate audio. Please try again.';
-            throw new Error(message);
-        }
-
-        if (!data.audio) {
-            throw new Error('No audio returned from server.');
-        }
-
-        // Convert base64 to audio blob
-        const audioBuffer = base64ToArrayBuffer(data.audio);
-        const blob = new Blob([audioBuffer], { type: data.contentType || 'audio/mpeg' });
+        const blob = await fetchSpeechBlob(trimmedText);
 
         // Cache the audio data
         audioCache.set(trimmedText, {
             blob: blob,
-            contentType: data.contentType || 'audio/mpeg',
+            contentType: blob.type || 'audio/mpeg',
             timestamp: Date.now()
         });
 
@@ -1,15 +1,62 @@
 import hanlp
-import unicodedata
-from dataclasses import dataclass, field
-from typing import List, Dict, Optional, Any
-from resources.utils import get_hsk_level
-from resources.dictionary import cedict_lookup, get_pinyin, hf_translate
-from concurrent.futures import ThreadPoolExecutor, Future
+import re
+import threading
+import torch
+from cachetools import LRUCache
+from dataclasses import dataclass
+from typing import List, Dict, Optional, Any, Sequence, Tuple, Union
+from resources.utils import lookup_phrase
+from resources.dictionary import (
+    DictionaryEntry,
+    TranslationError,
+    get_pinyin,
+    hf_translate,
+)
+from concurrent.futures import ThreadPoolExecutor, Future, wait
 from utils.aws import get_ssm_parameter
 import os
 
 
-tok = hanlp.load(hanlp.pretrained.tok.COARSE_ELECTRA_SMALL_ZH, devices=["cpu"])
+_tok = None
+_tok_lock = threading.Lock()
+# The model is shared by every request thread in a worker, but its Hugging Face
+# fast tokenizer mutates padding/truncation state on each call and raises
+# "Already borrowed" if entered concurrently; run one batch at a time
+_tok_call_lock = threading.Lock()
+
+
+def get_tokenizer():
+    """
+    Load the HanLP tokenizer on first use.
+
+    Call it at startup under gunicorn --preload so workers share the
+    loaded model instead of each loading their own.
+    """
+    global _tok
+    if _tok is None:
+        with _tok_lock:
+            if _tok is None:
+                _tok = hanlp.load(
+                    hanlp.pretrained.tok.COARSE_ELECTRA_SMALL_ZH, devices=["cpu"]
+                )
+    return _tok
+
+
+# Under gunicorn --preload the model is loaded before workers fork. Run
+# inference single-threaded in forked workers so they never reuse the parent's
+# OpenMP thread pool, which does not survive fork; request concurrency comes
+# from the worker threads instead.
+os.register_at_fork(after_in_child=lambda: torch.set_num_threads(1))
+
+
+# Runs of CJK ideographs: Extension A, the unified block, compatibility
+# ideographs and the supplementary planes (Extension B onwards)
+CJK_IDEOGRAPHS_RE = re.compile(
+    r"[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\U00020000-\U0003134f]+"
+)
+
+# Split after sentence-ending punctuation, keeping it with its sentence
+SENTENCE_SPLIT_RE = re.compile(r"(?<=[。！？])")
 
 num_workers = 30
 if os.environ.get("APP_ENV") != "development":
@@ -22,96 +69,135 @@ if os.environ.get("APP_ENV") != "development":
 executor = ThreadPoolExecutor(max_workers=num_workers)
 
 
-@dataclass
+@dataclass(slots=True)
 class Phrase:
-    """Represents a processed Chinese phrase with pinyin, definition, and metadata."""
+    """A sentence end, carrying the translation of the whole sentence."""
 
     text: str
-    pinyin: str = ""
-    definition: str = ""
-    hsk_level: str = "N/A"
-    all_entries: List[Dict[str, Any]] = field(default_factory=list)
-    traditional: Optional[str] = None
-    simplified: Optional[str] = None
-    pinyin_raw: Optional[str] = None
-    is_sentence_end: bool = False
-
-    def __post_init__(self):
-        """Set traditional/simplified to text if not provided."""
-        # if self.traditional is None:
-        #     self.traditional = self.text
-        # if self.simplified is None:
-        #     self.simplified = self.text
-        self.populate()
+    definition: Union[str, Future] = ""
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert Phrase instance to dictionary for JSON serialization."""
-        result = {
+        assert isinstance(self.definition, str)
+        return {
             "text": self.text,
-            "pinyin": self.pinyin,
+            "pinyin": "",
             "definition": self.definition,
-            "hsk_level": self.hsk_level,
-            "all_entries": self.all_entries,
-            # "traditional": self.traditional,
-            # "simplified": self.simplified,
-            # "pinyin_raw": self.pinyin_raw,
+            "hsk_level": "N/A",
+            "all_entries": [],
+            "is_sentence_end": True,
         }
 
-        if self.is_sentence_end:
-            result["is_sentence_end"] = True
 
-        return result
+def join_entries(entries: Sequence[DictionaryEntry]) -> Tuple[str, str]:
+    """Combine the distinct pinyin and definitions of a word's entries."""
+    # Ordered de-duplication of readings and senses across entries
+    all_pinyin = list(dict.fromkeys(e.pinyin for e in entries if e.pinyin))
+    all_definitions = list(dict.fromkeys(e.definition for e in entries if e.definition))
+    pinyin = " / ".join(all_pinyin) if all_pinyin else "[Not found]"
+    definition = " | ".join(all_definitions) if all_definitions else "[Not found]"
+    return pinyin, definition
+
+
+def get_translation_future(text: str, futures: Dict[str, Future]) -> Future:
+    """
+    Return the Future translating text, submitting it if not yet in flight.
+
+    Repeated unknown words and sentences within a request share a single
+    Future (tracked in futures) instead of each making its own Hugging Face
+    call.
+    """
+    future = futures.get(text)
+    if future is None:
+        future = futures[text] = executor.submit(hf_translate, text)
+    return future
+
+
+def resolve_translations(futures: Dict[str, Future]) -> Tuple[Dict[str, str], bool]:
+    """
+    Collect finished translations, substituting a placeholder for failures.
 
-    def populate(self):
-        if self.is_sentence_end:
-            self.definition = executor.submit(hf_translate, self.text)
-            return
-
-        if not all(is_chinese_ideograph(w) for w in self.text):
-            return
-
-        entries = cedict_lookup(self.text)
-
-        if entries:
-            all_pinyin = []
-            all_definitions = []
-            for entry in entries:
-                if entry["pinyin"] and entry["pinyin"] not in all_pinyin:
-                    all_pinyin.append(entry["pinyin"])
-                if entry["definition"] and entry["definition"] not in all_definitions:
-                    all_definitions.append(entry["definition"])
-            self.pinyin = (" / ".join(all_pinyin) if all_pinyin else "[Not found]",)
-            self.definition = (
-                " | ".join(all_definitions) if all_definitions else "[Not found]",
-            )
-        else:
-            self.pinyin = get_pinyin(self.text)
-            self.definition = executor.submit(hf_translate, self.text)
-
-        self.all_entries = entries
-        self.hsk_level = get_hsk_level(self.text)
-
-    def resolve_translation(self):
-        if isinstance(self.definition, Future):
-            self.definition = self.definition.result()
-
-
-def is_chinese_ideograph(char):
+    Returns:
+        Mapping of text to translation, and whether any translation failed
+    """
+    resolved: Dict[str, str] = {}
+    failed = False
+    for text, future in futures.items():
+        try:
+            resolved[text] = future.result()
+        except TranslationError as e:
+            resolved[text] = f"[Translation unavailable: {e}]"
+            failed = True
+    return resolved, failed
+
+
+def make_token_dict(text: str, futures: Dict[str, Future]) -> Dict[str, Any]:
     """
-    Checks if a character is classified as a CJK Ideograph ('Lo').
-    This excludes all standard punctuation, spaces, and numbers.
+    Build the JSON-ready dict for an ordinary (non sentence-end) token.
+
+    An unknown word's definition is left as its translation Future for the
+    caller to resolve.
     """
-    return unicodedata.category(char) == "Lo"
+    result = {
+        "text": text,
+        "pinyin": "",
+        "definition": "",
+        "hsk_level": "N/A",
+        "all_entries": [],
+    }
+    if CJK_IDEOGRAPHS_RE.fullmatch(text) is None:
+        return result
+
+    entries, result["hsk_level"] = lookup_phrase(text)
+    if entries:
+        result["pinyin"], result["definition"] = join_entries(entries)
+        result["all_entries"] = [entry.to_dict() for entry in entries]
+    else:
+        result["pinyin"] = get_pinyin(text)
+        result["definition"] = get_translation_future(text, futures)
+
+    return result
+
+
+# Sentence -> segmented phrases, shared by request threads
+_segment_cache: LRUCache = LRUCache(maxsize=4096)
+_segment_cache_lock = threading.Lock()
 
 
 def segment_chinese_text(text):
     """
     Segment Chinese text into phrases.
 
+    Segmentation is cached per sentence, so repeated sentences (and
+    re-submitted articles that differ only in places) skip the model.
+    Uncached sentences go to HanLP as one batch.
+
     Returns:
         List[str]
     """
-    return tok(text)
+    sentences = [s for s in SENTENCE_SPLIT_RE.split(text) if s]
+
+    with _segment_cache_lock:
+        cached = [_segment_cache.get(sentence) for sentence in sentences]
+
+    missing = list(
+        dict.fromkeys(s for s, tokens in zip(sentences, cached) if tokens is None)
+    )
+    segmented: Dict[str, Tuple[str, ...]] = {}
+    if missing:
+        tok = get_tokenizer()
+        with _tok_call_lock:
+            results = tok(missing)
+        segmented = {
+            sentence: tuple(tokens) for sentence, tokens in zip(missing, results)
+        }
+        with _segment_cache_lock:
+            _segment_cache.update(segmented)
+
+    phrases = []
+    for sentence, tokens in zip(sentences, cached):
+        phrases.extend(tokens if tokens is not None else segmented[sentence])
+    return phrases
 
 
 def process_chinese_text(text):
@@ -123,41 +209,60 @@ def process_chinese_text(text):
         dictionary: ChineseDictionary instance for lookups
 
     Returns:
-        dict: Dictionary containing 'phrases' list and 'original_text'
-              Each phrase has 'text', 'pinyin', and 'definition' keys
+        dict: Dictionary containing 'phrases' list, 'original_text' and
+              'translation_failed' (True if any translation fell back to a
+              placeholder). Each phrase has 'text', 'pinyin', and
+              'definition' keys
     """
     if not text:
-        return {"phrases": [], "original_text": text}
+        return {"phrases": [], "original_text": text, "translation_failed": False}
 
-    processed_phrases: List[Phrase] = []
+    # Output dicts in order; sentence ends hold a placeholder until resolved
+    processed_phrases: List[Optional[Dict[str, Any]]] = []
+    # Sentence-end Phrases and their positions in processed_phrases
+    sentence_ends: List[Tuple[int, Phrase]] = []
 
     phrases = segment_chinese_text(text)
 
-    # Track sentence phrases
-    sentence_phrases = []
+    # Index of the first token of the current sentence
+    sentence_start = 0
 
-    for i, phrase_text in enumerate(phrases):
-        phrase = Phrase(text=phrase_text)
+    # Word and sentence translations are submitted as soon as each is built so
+    # the network calls overlap with building the rest of the text
+    translations: Dict[str, Future] = {}
 
+    for i, phrase_text in enumerate(phrases):
         if phrase_text == "。":
             # This period ends a sentence
-            # Join all phrases from sentence start to current (excluding the period)
-            sentence_text = "".join(p.text for p in sentence_phrases)
-            full_sentence = sentence_text.strip()
-            if full_sentence:
-                phrase = Phrase(text=full_sentence, is_sentence_end=True)
+            # Join all tokens from sentence start to current (excluding the period)
+            full_sentence = "".join(phrases[sentence_start:i]).strip()
             # Reset for next sentence
-            sentence_phrases = []
-        else:
-            # Add this phrase to the current sentence
-            sentence_phrases.append(phrase)
-
-        processed_phrases.append(phrase)
-
-    for phrase in processed_phrases:
-        phrase.resolve_translation()
-
-    # Convert Phrase objects to dictionaries for JSON serialization
-    phrases_dict = [phrase.to_dict() for phrase in processed_phrases]
-
-    return {"phrases": phrases_dict, "original_text": text}
+            sentence_start = i + 1
+            if full_sentence:
+                phrase = Phrase(
+                    text=full_sentence,
+                    definition=get_translation_future(full_sentence, translations),
+                )
+                sentence_ends.append((len(processed_phrases), phrase))
+                processed_phrases.append(None)
+                continue
+
+        processed_phrases.append(make_token_dict(phrase_text, translations))
+
+    # Every translation is already in flight; wait for them together before
+    # resolving instead of blocking on each phrase in turn
+    wait(translations.values())
+    resolved, translation_failed = resolve_translations(translations)
+    for token in processed_phrases:
+        if token is not None and isinstance(token["definition"], Future):
+            token["definition"] = resolved[token["text"]]
+    for index, phrase in sentence_ends:
+        if isinstance(phrase.definition, Future):
+            phrase.definition = resolved[phrase.text]
+        processed_phrases[index] = phrase.to_dict()
+
+    return {
+        "phrases": processed_phrases,
+        "original_text": text,
+        "translation_failed": translation_failed,
+    }
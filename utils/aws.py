@@ -1,42 +1,72 @@
 import os
+import threading
+import time
+from functools import lru_cache
+from typing import Dict, Tuple
+
 import boto3
+from botocore.config import Config
 
 ENVIRONMENT = os.getenv("APP_ENV", "production")
 
-_polly_client = None
-_ssm_client = None
+# Parameter values are reused for this long before SSM is asked again
+SSM_CACHE_TTL_SECONDS = 300
+_ssm_cache: Dict[Tuple[str, bool], Tuple[float, str]] = {}
+_ssm_cache_lock = threading.Lock()
+
+# Sized for concurrent read-aloud requests; botocore defaults to 10
+POLLY_CONFIG = Config(max_pool_connections=50, retries={"max_attempts": 2})
 
 if ENVIRONMENT == "development":
-    AWS_REGION = os.getenv("AWS_REGION")
     AWS_POLLY_DEV_ACCESS_KEY = os.getenv("AWS_POLLY_DEV_ACCESS_KEY")
     AWS_POLLY_DEV_KEY_ID = os.getenv("AWS_POLLY_DEV_KEY_ID")
-else:
-    session = boto3.Session()
-    AWS_REGION = session.region_name
+
+# Prefer the environment; a boto3 Session walks the whole config chain
+# (and possibly instance metadata) to resolve the region
+AWS_REGION = os.getenv("AWS_REGION") or boto3.Session().region_name
 
 
+@lru_cache(maxsize=1)
 def get_polly_client():
-    global _polly_client
-    if _polly_client is None:
-        if ENVIRONMENT == "production":
-            _polly_client = boto3.client(
-                "polly",
-                region_name=AWS_REGION,
-            )
-        else:
-            _polly_client = boto3.client(
-                "polly",
-                region_name=AWS_REGION,
-                aws_access_key_id=AWS_POLLY_DEV_KEY_ID,
-                aws_secret_access_key=AWS_POLLY_DEV_ACCESS_KEY,
-            )
-    return _polly_client
+    """Shared Polly client; boto3 clients are thread-safe."""
+    if ENVIRONMENT == "production":
+        return boto3.client(
+            "polly",
+            region_name=AWS_REGION,
+            config=POLLY_CONFIG,
+        )
+    return boto3.client(
+        "polly",
+        region_name=AWS_REGION,
+        aws_access_key_id=AWS_POLLY_DEV_KEY_ID,
+        aws_secret_access_key=AWS_POLLY_DEV_ACCESS_KEY,
+        config=POLLY_CONFIG,
+    )
+
+
+@lru_cache(maxsize=1)
+def get_ssm_client():
+    """Shared SSM client, created on first use."""
+    return boto3.client("ssm")
+
+
+def _reset_clients():
+    """Drop clients (and their connection pools) inherited from a parent process."""
+    get_polly_client.cache_clear()
+    get_ssm_client.cache_clear()
+
+
+# botocore clients are not fork-safe; under gunicorn --preload the master
+# creates the SSM client at import, so each worker must build its own
+os.register_at_fork(after_in_child=_reset_clients)
 
 
 def get_ssm_parameter(parameter_name: str, with_decryption: bool = True) -> str:
     """
     Get a parameter from AWS Systems Manager Parameter Store.
 
+    Values are cached in memory for SSM_CACHE_TTL_SECONDS.
+
     Args:
         parameter_name: The name of the parameter to retrieve
         with_decryption: Whether to decrypt SecureString parameters
@@ -47,16 +77,22 @@ def get_ssm_parameter(parameter_name: str, with_decryption: bool = True) -> str:
     Raises:
         RuntimeError: If the parameter cannot be retrieved
     """
-    global _ssm_client
-    if _ssm_client is None:
-        _ssm_client = boto3.client("ssm")
+    key = (parameter_name, with_decryption)
+    with _ssm_cache_lock:
+        cached = _ssm_cache.get(key)
+    if cached is not None and time.monotonic() - cached[0] < SSM_CACHE_TTL_SECONDS:
+        return cached[1]
 
     try:
-        response = _ssm_client.get_parameter(
+        response = get_ssm_client().get_parameter(
             Name=parameter_name, WithDecryption=with_decryption
         )
-        return response["Parameter"]["Value"]
+        value = response["Parameter"]["Value"]
     except Exception as e:
         raise RuntimeError(
             f"Could not retrieve parameter {parameter_name} from SSM: {e}"
         )
+
+    with _ssm_cache_lock:
+        _ssm_cache[key] = (time.monotonic(), value)
+    return value